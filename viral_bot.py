@@ -1,13 +1,23 @@
 import requests
-import feedparser
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import etree
+import orjson
 import random
 import time
 import os
 import datetime
+import hashlib
 import re
+import string
 import logging
-from bs4 import BeautifulSoup
+import threading
+import tempfile
+from urllib.parse import urlparse, urlsplit, urlunsplit
+from email.utils import formatdate, parsedate_to_datetime
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from bs4 import BeautifulSoup, SoupStrainer
+import soupsieve
 
 # --- LOGGING CONFIGURATION ---
 logging.basicConfig(
@@ -17,11 +27,32 @@ logging.basicConfig(
 )
 
 # --- CONFIGURATION ---
-HISTORY_FILE = "history.json"
+HISTORY_FILE = "history.jsonl"
+HISTORY_LIMIT = 200
+HISTORY_SLACK = 50
+FEED_META_FILE = "feed_meta.json"
+MODEL_CACHE_FILE = "model_cache.json"
+MODEL_CACHE_TTL = 24 * 60 * 60
+ARTICLE_CACHE_FILE = "article_cache.json"
+ARTICLE_CACHE_TTL = 7 * 24 * 60 * 60
+MAX_FEED_BYTES = 4 * 1024 * 1024
+FEED_RECHECK_SECONDS = 30 * 60
+FEED_STORED_ENTRIES = 10
+MAX_ARTICLE_BYTES = 1024 * 1024
+MIN_ARTICLE_BYTES = 4000
+MAX_IMAGE_BYTES = 8 * 1024 * 1024
+MAX_ATTEMPTS = 5
+FEED_WORKERS = 8
+SCRAPE_WORKERS = 8
+# After the first usable article, how long better-ranked feeds get to catch up before it is taken
+PICK_WINDOW = 2.0
 LINKEDIN_PERSON_URN = os.environ.get("LINKEDIN_URN", "").strip()
 LINKEDIN_ACCESS_TOKEN = os.environ.get("LINKEDIN_TOKEN", "").strip()
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "").strip()
+HUMANIZE_DELAY_MAX = int(os.environ.get("HUMANIZE_DELAY_MAX", "0"))
 
+# The first is tried directly until a model is cached; the models-list probe only runs on a rejection
+PREFERRED_MODELS = ("gemini-2.5-flash", "gemini-flash-latest", "gemini-2.0-flash", "gemini-2.5-pro")
 # --- FALLBACK IMAGES ---
 FALLBACK_IMAGES = [
     "https://images.unsplash.com/photo-1558494949-ef526b0042a0", 
@@ -50,46 +81,144 @@ ENGINEERING_FEEDS = [
     "https://engineering.linkedin.com/blog.rss"
 ]
 
+# Promotional / non-article entries, rejected on the title alone before any scrape
+_SKIP_TITLE_RE = re.compile(r"\b(sponsored|webinar|hiring|job openings?|giveaway|podcast|coupon|promo code|black friday)\b", re.IGNORECASE)
+
+# Share of runs that post an engineering concept rather than news
+CONCEPT_SHARE = 0.85
+
 HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    # Accept-Encoding is left to requests: it asks for gzip/deflate, plus br whenever brotli is installed
 }
 
+# --- HTTP SESSIONS ---
+# Longer waits would stall the run (and hold the rate-limit bucket); give up instead
+MAX_RETRY_AFTER = 60
+
+class CappedRetry(Retry):
+    """urllib3 Retry that never sleeps longer than MAX_RETRY_AFTER, whatever the server's Retry-After says."""
+    def get_retry_after(self, response):
+        delay = super().get_retry_after(response)
+        return None if delay is None else min(delay, MAX_RETRY_AFTER)
+
+# One pooled session for everything so TCP/TLS connections are reused across calls.
+# urllib3 only retries idempotent methods by default, so a POST is never replayed.
+def _build_session(headers):
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=32,
+        max_retries=CappedRetry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+SESSION = _build_session(HEADERS)
+LINKEDIN_SESSION = _build_session({"Authorization": f"Bearer {LINKEDIN_ACCESS_TOKEN}"})
+
+class TokenBucket:
+    """
+    Thread-safe client-side rate limiter. Adaptive: the refill rate halves on a 429
+    and creeps back toward the configured rate on every success.
+    """
+    def __init__(self, capacity, refill_per_sec):
+        self.capacity = capacity
+        self.max_rate = refill_per_sec
+        self.rate = refill_per_sec
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def record(self, status_code):
+        with self.lock:
+            if status_code == 429:
+                self.rate = max(self.max_rate / 16, self.rate / 2)
+            elif status_code < 400:
+                self.rate = min(self.max_rate, self.rate * 1.1)
+
+GEMINI_BUCKET = TokenBucket(60, 1.0)
+LINKEDIN_BUCKET = TokenBucket(20, 0.33)
+
+# (connect, read) for API calls: Gemini can take a while to write, but a hung socket must not stall the run
+API_TIMEOUT = (10, 60)
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+def retry_after_seconds(value):
+    """Retry-After as seconds, from either delta-seconds or an HTTP-date. None if absent or unparseable."""
+    if value.isdigit(): return int(value)
+    try: return max(0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError): return None
+
+def request_with_backoff(session, method, url, max_attempts=4, retry_statuses=RETRYABLE_STATUSES, bucket=None, **kwargs):
+    """
+    Retries a single API call on transient errors with capped exponential backoff + jitter,
+    honouring Retry-After, so a 429/503 doesn't send us back through the whole pipeline.
+    """
+    kwargs.setdefault("timeout", API_TIMEOUT)
+    for attempt in range(max_attempts):
+        if bucket: bucket.acquire()
+        resp = session.request(method, url, **kwargs)
+        if bucket: bucket.record(resp.status_code)
+        if resp.status_code not in retry_statuses or attempt == max_attempts - 1:
+            return resp
+        
+        delay = retry_after_seconds(resp.headers.get("Retry-After", "").strip())
+        if delay is None:
+            delay = min(30, 2 ** attempt) + random.uniform(0, 1)
+        elif delay > MAX_RETRY_AFTER:
+            logging.warning(f"HTTP {resp.status_code} from {url.split('?')[0]} asks to wait {delay:.0f}s. Giving up.")
+            return resp
+        logging.warning(f"HTTP {resp.status_code} from {url.split('?')[0]}. Retrying in {delay:.1f}s ({attempt + 1}/{max_attempts - 1})...")
+        time.sleep(delay)
+
 # --- UNICODE TEXT STYLING FOR LINKEDIN ---
+# Unicode character mappings for styled text
+# Mathematical Sans-Serif Bold: each run of letters/digits is contiguous in Unicode,
+# so the table is just an offset per run
+BOLD_BLOCKS = ((string.ascii_uppercase, 0x1D5D4), (string.ascii_lowercase, 0x1D5EE), (string.digits, 0x1D7EC))
+# C-level translation table and patterns, built once at import
+_BOLD_TRANS = {ord(c): start + i for chars, start in BOLD_BLOCKS for i, c in enumerate(chars)}
+_BOLD_RE = re.compile(r'\[BOLD:(.*?)\]')
+_MARKDOWN_RE = re.compile(r'\*\*|__|##')
+_BULLET_RE = re.compile(r'^[\*\-]\s+', re.MULTILINE)
+_NEWLINE_RE = re.compile(r'\n{3,}')
+
 def apply_unicode_styling(text):
     """
     Converts text to Unicode styled variants since LinkedIn doesn't support markdown.
     Uses mathematical alphanumeric symbols for bold/italic effects.
     """
-    # Unicode character mappings for styled text
-    BOLD_MAP = {
-        'A': '𝗔', 'B': '𝗕', 'C': '𝗖', 'D': '𝗗', 'E': '𝗘', 'F': '𝗙', 'G': '𝗚', 'H': '𝗛', 'I': '𝗜', 'J': '𝗝',
-        'K': '𝗞', 'L': '𝗟', 'M': '𝗠', 'N': '𝗡', 'O': '𝗢', 'P': '𝗣', 'Q': '𝗤', 'R': '𝗥', 'S': '𝗦', 'T': '𝗧',
-        'U': '𝗨', 'V': '𝗩', 'W': '𝗪', 'X': '𝗫', 'Y': '𝗬', 'Z': '𝗭',
-        'a': '𝗮', 'b': '𝗯', 'c': '𝗰', 'd': '𝗱', 'e': '𝗲', 'f': '𝗳', 'g': '𝗴', 'h': '𝗵', 'i': '𝗶', 'j': '𝗷',
-        'k': '𝗸', 'l': '𝗹', 'm': '𝗺', 'n': '𝗻', 'o': '𝗼', 'p': '𝗽', 'q': '𝗾', 'r': '𝗿', 's': '𝘀', 't': '𝘁',
-        'u': '𝘂', 'v': '𝘃', 'w': '𝘄', 'x': '𝘅', 'y': '𝘆', 'z': '𝘇',
-        '0': '𝟬', '1': '𝟭', '2': '𝟮', '3': '𝟯', '4': '𝟰', '5': '𝟱', '6': '𝟲', '7': '𝟳', '8': '𝟴', '9': '𝟵'
-    }
-    
-    def make_bold(match):
-        text = match.group(1)
-        return ''.join(BOLD_MAP.get(c, c) for c in text)
-    
     # Convert [BOLD:text] markers to Unicode bold
-    text = re.sub(r'\[BOLD:(.*?)\]', make_bold, text)
+    text = _BOLD_RE.sub(lambda m: m.group(1).translate(_BOLD_TRANS), text)
     
     return text
 
 def clean_text_for_linkedin(text):
     """Enhanced text cleaning with Unicode styling support"""
-    # Remove markdown artifacts
-    text = text.replace("**", "").replace("__", "").replace("##", "")
+    # Remove markdown artifacts (single pass)
+    text = _MARKDOWN_RE.sub("", text)
     
     # Replace bullet points with stylish alternatives
-    text = re.sub(r'^[\*\-]\s+', '▸ ', text, flags=re.MULTILINE)
+    text = _BULLET_RE.sub('▸ ', text)
     
     # Clean up excessive newlines
-    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = _NEWLINE_RE.sub('\n\n', text)
     
     # Apply Unicode styling for emphasis
     text = apply_unicode_styling(text)
@@ -97,33 +226,240 @@ def clean_text_for_linkedin(text):
     return text.strip()
 
 # --- UTILS ---
+def write_atomic(path, data):
+    """Writes via a temp file + rename, so a run killed mid-write leaves the previous file intact"""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f: f.write(data)
+    os.replace(tmp, path)
+
 def load_history():
+    """history.jsonl holds one posted entry per line; a torn or corrupt line is skipped, not fatal"""
+    history_data = []
     if os.path.exists(HISTORY_FILE):
-        try:
-            with open(HISTORY_FILE, "r") as f: return json.load(f)
-        except: return []
-    return []
+        with open(HISTORY_FILE, "rb") as f:
+            for line in f:
+                if not line.strip(): continue
+                try: history_data.append(orjson.loads(line))
+                except orjson.JSONDecodeError: logging.warning("Skipping corrupt history line.")
+    return history_data
 
-def save_history(history_data, title, link):
-    entry = {"title": title, "web_link": link.split("?")[0], "date": datetime.datetime.now().strftime("%Y-%m-%d")}
+def clean_url(url):
+    """Canonical form for duplicate checks: lowercase scheme/host, no query, fragment or trailing slash"""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), "", ""))
+
+def save_history(history_data, title, link, seen=None):
+    entry = {"title": title, "web_link": clean_url(link), "date": datetime.datetime.now().strftime("%Y-%m-%d")}
     history_data.append(entry)
-    if len(history_data) > 200: history_data = history_data[-200:]
-    with open(HISTORY_FILE, "w") as f: json.dump(history_data, f, indent=4)
+    if seen:
+        seen[0].add(entry["web_link"])
+        seen[1].add(title)
+    if len(history_data) > HISTORY_LIMIT + HISTORY_SLACK:
+        # Rotate: rewrite once with the newest entries; the slack keeps this off the every-post path
+        del history_data[:-HISTORY_LIMIT]
+        write_atomic(HISTORY_FILE, b"".join(orjson.dumps(e) + b"\n" for e in history_data))
+    else:
+        with open(HISTORY_FILE, "ab") as f: f.write(orjson.dumps(entry) + b"\n")
+
+def build_seen_index(history_data):
+    """(links, titles) sets for O(1) duplicate checks; built once per run"""
+    # Older entries were stored with only the query stripped; normalize them the same way
+    seen_links = {clean_url(e["web_link"]) for e in history_data if e.get("web_link")}
+    seen_titles = {e["title"] for e in history_data if e.get("title")}
+    return seen_links, seen_titles
 
-def is_already_posted(link, title, history_data):
-    clean_link = link.split("?")[0]
-    for entry in history_data:
-        if entry.get("web_link") == clean_link or entry.get("title") == title: return True
-    return False
+def is_already_posted(link, title, seen):
+    seen_links, seen_titles = seen
+    return clean_url(link) in seen_links or title in seen_titles
+
+def load_feed_meta():
+    """Per-feed ETag / Last-Modified values from the previous run"""
+    if os.path.exists(FEED_META_FILE):
+        try:
+            with open(FEED_META_FILE, "rb") as f: return orjson.loads(f.read())
+        except: return {}
+    return {}
+
+# Feed downloads can still be finishing in the background when feed_meta is saved
+FEED_META_LOCK = threading.Lock()
+
+def save_feed_meta(feed_meta):
+    with FEED_META_LOCK: write_atomic(FEED_META_FILE, orjson.dumps(feed_meta, option=orjson.OPT_INDENT_2))
+
+def read_capped(response, limit, truncate=False):
+    """
+    Reads a streamed response (gzip/deflate/br are decoded transparently) up to limit bytes.
+    Oversized bodies return None, or their first limit bytes when truncate is set.
+    """
+    chunks, size = [], 0
+    for chunk in response.iter_content(chunk_size=64 * 1024):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > limit:
+            response.close()
+            return b"".join(chunks)[:limit] if truncate else None
+    return b"".join(chunks)
+
+# Parsed feeds for this run (url -> Future), so each feed is downloaded once even when
+# several callers ask for it at the same time
+_FEED_CACHE = {}
+_FEED_CACHE_LOCK = threading.Lock()
+
+def fetch_feed(feed_url, feed_meta):
+    """Conditional GET of a feed. Returns its top entries (the stored ones when unchanged), or None if unreachable."""
+    with _FEED_CACHE_LOCK:
+        future = _FEED_CACHE.get(feed_url)
+        owner = future is None
+        if owner: future = _FEED_CACHE[feed_url] = Future()
+    # The first caller downloads; everyone else waits on its result
+    if owner:
+        try:
+            feed = _download_feed(feed_url, feed_meta)
+            # Counted here so a feed scanned by several attempts counts once per run
+            if feed:
+                with FEED_META_LOCK:
+                    stats = feed_meta.setdefault(feed_url, {})
+                    stats["attempts"] = stats.get("attempts", 0) + 1
+            future.set_result(feed)
+        except Exception as e: future.set_exception(e)
+    return future.result()
+
+def _download_feed(feed_url, feed_meta):
+    meta = feed_meta.get(feed_url, {})
+    # Top entries from the last full download; an unchanged feed still has unposted candidates
+    stored = meta.get("entries")
+    # Fetched moments ago (e.g. a manual re-run): reuse the stored entries without touching the network
+    if stored and time.time() - meta.get("last_fetch", 0) < FEED_RECHECK_SECONDS:
+        logging.info(f"Feed checked recently, using stored entries: {feed_url}")
+        return stored
+    
+    # Without stored entries a 304 would leave nothing to scan, so ask for the full feed
+    headers = {}
+    if stored and meta.get("etag"): headers["If-None-Match"] = meta["etag"]
+    if stored and meta.get("modified"): headers["If-Modified-Since"] = meta["modified"]
+
+    r = SESSION.get(feed_url, headers=headers, timeout=10, stream=True)
+    if r.status_code in (200, 304):
+        with FEED_META_LOCK: feed_meta.setdefault(feed_url, {})["last_fetch"] = time.time()
+    if r.status_code != 200:
+        # Nothing to read; hand the connection back to the pool
+        r.close()
+        if r.status_code == 304:
+            logging.info(f"Feed unchanged, using stored entries: {feed_url}")
+            return stored
+        return None
+
+    body = read_capped(r, MAX_FEED_BYTES)
+    if body is None:
+        logging.warning(f"Feed larger than {MAX_FEED_BYTES} bytes, skipping: {feed_url}")
+        return None
+
+    entries = parse_feed_entries(body)[:FEED_STORED_ENTRIES]
+    with FEED_META_LOCK:
+        feed_meta.setdefault(feed_url, {}).update({"etag": r.headers.get("ETag"), "modified": r.headers.get("Last-Modified"), "entries": entries})
+    return entries
+
+_ATOM_ENTRY = "{http://www.w3.org/2005/Atom}entry"
+_RSS1_ITEM = "{http://purl.org/rss/1.0/}item"
+_FEED_PARSER = etree.XMLParser(resolve_entities=False, no_network=True, huge_tree=False)
+
+def parse_feed_entries(body):
+    """
+    Minimal RSS/Atom parse with lxml: we only need each entry's title and link.
+    Falls back to feedparser for malformed or unusual feeds.
+    """
+    try:
+        root = etree.fromstring(body, _FEED_PARSER)
+        entries = []
+        for item in root.iter("item", _RSS1_ITEM, _ATOM_ENTRY):
+            # Children share the entry's namespace (none for RSS 2.0); avoids matching media:title etc.
+            ns = item.tag[:item.tag.index("}") + 1] if item.tag.startswith("{") else ""
+            title = (item.findtext(ns + "title") or "").strip()
+            link = None
+            if item.tag == _ATOM_ENTRY:
+                for el in item.iterfind(ns + "link"):
+                    if el.get("rel", "alternate") == "alternate":
+                        link = el.get("href")
+                        break
+            else:
+                link = (item.findtext(ns + "link") or "").strip()
+            entries.append({"title": title, "link": link})
+        if entries: return entries
+    except etree.XMLSyntaxError:
+        pass
+    
+    # Imported here: well-formed feeds never need it
+    import feedparser
+    return [{"title": e.get("title"), "link": e.get("link")} for e in feedparser.parse(body).entries]
+
+def safe_fetch_feed(feed_url, feed_meta):
+    try:
+        return fetch_feed(feed_url, feed_meta)
+    except Exception as e:
+        logging.warning(f"Feed Error ({feed_url}): {e}")
+        return None
+
+def order_sources(sources, feed_meta):
+    """
+    Weighted random order without replacement (Efraimidis-Spirakis keys).
+    Feeds that produced published posts before are tried first more often;
+    weight is the Laplace-smoothed success rate (success+1)/(attempts+2).
+    """
+    def key(url):
+        stats = feed_meta.get(url, {})
+        weight = (stats.get("success", 0) + 1) / (stats.get("attempts", 0) + 2)
+        return random.random() ** (1 / weight)
+    return sorted(sources, key=key, reverse=True)
 
 # --- DYNAMIC MODEL SELECTOR ---
-def get_valid_model_name():
+_MODEL_CACHE = None  # (model_name, fetched_at)
+_MODEL_LOCK = threading.Lock()
+
+def _gemini_key_hash():
+    # model_cache.json is committed to the repo, so only a short digest of the key goes in it
+    return hashlib.sha256(GEMINI_API_KEY.encode()).hexdigest()[:16]
+
+def _load_model_cache():
+    global _MODEL_CACHE
+    if _MODEL_CACHE is None and os.path.exists(MODEL_CACHE_FILE):
+        try:
+            with open(MODEL_CACHE_FILE, "rb") as f:
+                cached = orjson.loads(f.read())
+            # The available models depend on the key; ignore a cache written for a different one
+            if cached.get("key_hash") == _gemini_key_hash():
+                _MODEL_CACHE = (cached["model"], cached["fetched_at"])
+        except: pass
+    if _MODEL_CACHE and time.time() - _MODEL_CACHE[1] < MODEL_CACHE_TTL:
+        return _MODEL_CACHE[0]
+    return None
+
+def cached_model_name():
+    """The model resolved within the last 24h (memory, then model_cache.json), or None"""
+    with _MODEL_LOCK:
+        return _load_model_cache()
+
+def get_valid_model_name(refresh=False):
+    """Cached model lookup, falling back to the models-list API. refresh=True skips the cache (the cached model was rejected)."""
+    global _MODEL_CACHE
+    with _MODEL_LOCK:
+        if not refresh:
+            model = _load_model_cache()
+            if model: return model
+        
+        model = fetch_valid_model_name()
+        if not model: return PREFERRED_MODELS[0]
+        
+        _MODEL_CACHE = (model, time.time())
+        write_atomic(MODEL_CACHE_FILE, orjson.dumps({"model": model, "fetched_at": _MODEL_CACHE[1], "key_hash": _gemini_key_hash()}, option=orjson.OPT_INDENT_2))
+        return model
+
+def fetch_valid_model_name():
     """Asks Google which models are actually available to avoid 404s"""
     url = f"https://generativelanguage.googleapis.com/v1beta/models?key={GEMINI_API_KEY}"
     try:
-        response = requests.get(url)
+        response = SESSION.get(url, timeout=10)
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             available_models = [
                 m['name'].replace("models/", "") 
                 for m in data.get('models', []) 
@@ -131,9 +467,8 @@ def get_valid_model_name():
             ]
             
             # Prefer Flash, then Pro, then anything else
-            if "gemini-1.5-flash" in available_models: return "gemini-1.5-flash"
-            if "gemini-1.5-flash-latest" in available_models: return "gemini-1.5-flash-latest"
-            if "gemini-1.0-pro" in available_models: return "gemini-1.0-pro"
+            for name in PREFERRED_MODELS:
+                if name in available_models: return name
             
             if available_models:
                 logging.warning(f"Preferred model not found. Using fallback: {available_models[0]}")
@@ -142,150 +477,304 @@ def get_valid_model_name():
     except Exception as e:
         logging.error(f"Could not fetch model list: {e}")
     
-    return "gemini-1.5-flash-latest"
+    return None
 
 # --- ENHANCED IMAGE SCRAPER ---
-def get_article_details(url, mode):
-    try:
-        logging.info(f"Scraping URL: {url}")
-        r = requests.get(url, headers=HEADERS, timeout=10)
-        soup = BeautifulSoup(r.content, 'html.parser')
-        
-        possible_bodies = soup.select('article, .post-content, .entry-content, #article-body, .gh-content')
-        target = possible_bodies[0] if possible_bodies else soup
-        text = "\n".join([p.get_text().strip() for p in target.find_all(['p', 'h2'])])
-        
-        if len(text) < 600: return None
+# Scrapes run concurrently; keep a small gap between hits on the same publisher instead of blanket sleeps
+_LAST_HIT = {}
+_LAST_HIT_LOCK = threading.Lock()
+SAME_HOST_GAP = 0.3
+
+def polite_wait(url):
+    host = urlparse(url).netloc
+    with _LAST_HIT_LOCK:
+        now = time.monotonic()
+        slot = max(now, _LAST_HIT.get(host, 0) + SAME_HOST_GAP)
+        _LAST_HIT[host] = slot
+    if slot > now: time.sleep(slot - now)
+
+# CSS selectors compiled once instead of re-parsed by soupsieve on every scrape
+_BODY_SEL = soupsieve.compile('article, .post-content, .entry-content, #article-body, .gh-content')
+_META_IMAGE_SEL = soupsieve.compile('meta[name="twitter:image"], meta[property="og:image"]')
+_HERO_SEL = soupsieve.compile(', '.join([
+    'img.featured-image', 'img.hero-image', 'img.post-image',
+    'figure.featured img', 'div.featured-image img',
+    'div.post-thumbnail img', 'div.entry-image img'
+]))
+# Only these tags (and everything inside a kept one) are built into the tree; head scripts/styles,
+# nav menus and other top-level chrome are dropped while parsing instead of after.
+# The class/id selectors in _BODY_SEL can sit on any container, so every tag they are seen on is kept
+# (a body the strainer dropped would fall back to the whole page, footer and sidebars included)
+_ARTICLE_STRAINER = SoupStrainer(['main', 'article', 'section', 'div', 'span', 'header', 'figure', 'p', 'h2', 'meta', 'img'])
+# Logos, icons, tracking pixels
+_IMAGE_SKIP_RE = re.compile(r'logo|icon|avatar|pixel|tracking|1x1', re.IGNORECASE)
+
+def find_best_image(soup, target):
+    """
+    Ranks every image candidate in one pass instead of running the strategies one after another.
+    Twitter card (100) > OG (90) > hero/featured (80) > large content image (50) > first image (10).
+    """
+    best, best_score = None, 0
+    for meta in _META_IMAGE_SEL.select(soup):
+        content = meta.get("content")
+        if not content: continue
+        score = 100 if meta.get("name") == "twitter:image" else 90
+        if score > best_score: best, best_score = content, score
+        if best_score == 100: break
+    if best_score >= 90:
+        logging.info("Found Twitter Card image" if best_score == 100 else "Found OG image")
+        return best
+    
+    for i, img in enumerate(target.find_all('img')):
+        src = img.get('src', '')
+        if not src.startswith('http'): continue
         
-        # ENHANCED IMAGE EXTRACTION - Multiple strategies
-        image_url = None
+        if _HERO_SEL.match(img):
+            score = 80
+        else:
+            width, height = str(img.get('width', '0')), str(img.get('height', '0'))
+            w = int(width) if width.isdigit() else 0
+            h = int(height) if height.isdigit() else 0
+            # Prioritize larger images (likely feature images, not icons)
+            if (w > 400 or h > 300 or (w == 0 and h == 0)) and not _IMAGE_SKIP_RE.search(src):
+                score = 50
+            elif i == 0:
+                score = 10
+            else:
+                continue
         
-        # Strategy 1: Twitter/X card image (often best quality)
-        twitter_img = soup.find("meta", attrs={"name": "twitter:image"})
-        if twitter_img and twitter_img.get("content"):
-            image_url = twitter_img["content"]
-            logging.info("Found Twitter Card image")
+        if score > best_score: best, best_score = src, score
+        if best_score == 80: break
+    
+    if best: logging.info(f"Found content image (score {best_score})")
+    return best
+
+_ARTICLE_CACHE = None  # {url: {"text", "image", "fetched_at"}}
+_ARTICLE_CACHE_LOCK = threading.Lock()
+
+def get_cached_article(url):
+    """Parsed article from a recent run (article_cache.json is read on first use), or None"""
+    global _ARTICLE_CACHE
+    with _ARTICLE_CACHE_LOCK:
+        if _ARTICLE_CACHE is None:
+            _ARTICLE_CACHE = {}
+            if os.path.exists(ARTICLE_CACHE_FILE):
+                try:
+                    with open(ARTICLE_CACHE_FILE, "rb") as f: _ARTICLE_CACHE = orjson.loads(f.read())
+                except: pass
+        cached = _ARTICLE_CACHE.get(url)
+    if cached and time.time() - cached["fetched_at"] < ARTICLE_CACHE_TTL: return cached
+    return None
+
+def get_cached_post(url, prompt_key):
+    """Post text already generated for this article and prompt on a recent run, or None"""
+    cached = get_cached_article(url)
+    return cached.get("posts", {}).get(prompt_key) if cached else None
+
+def cache_post(url, prompt_key, text):
+    """Keeps a generated post with its article so a failed LinkedIn post doesn't cost a second Gemini call"""
+    with _ARTICLE_CACHE_LOCK:
+        entry = (_ARTICLE_CACHE or {}).get(url)
+        if entry: entry.setdefault("posts", {})[prompt_key] = text
+
+def save_article_cache(seen):
+    """Writes back the articles parsed this run and earlier, minus expired and already-posted ones"""
+    if _ARTICLE_CACHE is None: return
+    cutoff = time.time() - ARTICLE_CACHE_TTL
+    with _ARTICLE_CACHE_LOCK:
+        fresh = {u: a for u, a in _ARTICLE_CACHE.items() if a["fetched_at"] > cutoff and clean_url(u) not in seen[0]}
+    write_atomic(ARTICLE_CACHE_FILE, orjson.dumps(fresh))
+
+def get_article_details(url, mode, rejected_at=None):
+    """
+    Returns {text, image}; False when the page itself is unusable (non-HTML, too little text), which
+    is worth remembering as a rejection; None for transient failures and mode-specific skips.
+    """
+    try:
+        # Published articles rarely change; a parse from the last week is served without a request
+        parsed = get_cached_article(url)
+        if parsed:
+            logging.info(f"Using cached article: {url}")
+            return finish_article(parsed, mode)
         
-        # Strategy 2: Open Graph image
-        if not image_url:
-            og_image = soup.find("meta", property="og:image")
-            if og_image and og_image.get("content"): 
-                image_url = og_image["content"]
-                logging.info("Found OG image")
+        logging.info(f"Scraping URL: {url}")
+        polite_wait(url)
+        # Previously rejected page: a 304 means it is still the page we rejected
+        headers = {"If-Modified-Since": rejected_at} if rejected_at else {}
+        r = SESSION.get(url, headers=headers, timeout=10, stream=True)
+        if r.status_code != 200:
+            r.close()
+            if r.status_code == 304:
+                logging.info(f"Unchanged since it was rejected, skipping: {url}")
+                return False
+            return None
+        # Headers arrive before the body: drop non-HTML responses without downloading them
+        if "html" not in r.headers.get("Content-Type", "html"):
+            r.close()
+            return False
+        # Article text sits well inside the first MB; don't pull in huge pages
+        body = read_capped(r, MAX_ARTICLE_BYTES, truncate=True)
+        # A page this small can't hold 600 chars of article text plus markup; skip the parse
+        if len(body) < MIN_ARTICLE_BYTES: return False
+        # Parsed right here on the scrape thread: a run parses only a handful of pages, and lxml does
+        # the heavy lifting outside the GIL, so a process pool would cost more to start than it saves.
+        # A declared charset spares bs4 its encoding sniffing; without one requests would guess latin-1, so leave it to bs4
+        charset = requests.utils.get_encoding_from_headers(r.headers) if "charset=" in r.headers.get("Content-Type", "").lower() else None
+        parsed = parse_article(body, charset)
+        if not parsed: return parsed
         
-        # Strategy 3: Look for hero/featured images in article
-        if not image_url:
-            hero_selectors = [
-                'img.featured-image', 'img.hero-image', 'img.post-image',
-                'figure.featured img', 'div.featured-image img',
-                'div.post-thumbnail img', 'div.entry-image img'
-            ]
-            for selector in hero_selectors:
-                hero_img = target.select_one(selector)
-                if hero_img and hero_img.get('src'):
-                    src = hero_img['src']
-                    if src.startswith('http'):
-                        image_url = src
-                        logging.info("Found hero image")
-                        break
+        parsed["fetched_at"] = time.time()
+        with _ARTICLE_CACHE_LOCK: _ARTICLE_CACHE[url] = parsed
+        return finish_article(parsed, mode)
         
-        # Strategy 4: First large image in content (width/height check)
-        if not image_url:
-            for img in target.find_all('img'):
-                src = img.get('src', '')
-                width = img.get('width', '0')
-                height = img.get('height', '0')
-                
-                # Convert to int safely
-                try:
-                    w = int(width) if width and str(width).isdigit() else 0
-                    h = int(height) if height and str(height).isdigit() else 0
-                except:
-                    w, h = 0, 0
-                
-                # Prioritize larger images (likely feature images, not icons)
-                if src.startswith('http') and (w > 400 or h > 300 or (w == 0 and h == 0)):
-                    # Avoid logos, icons, tracking pixels
-                    if not any(skip in src.lower() for skip in ['logo', 'icon', 'avatar', 'pixel', 'tracking', '1x1']):
-                        image_url = src
-                        logging.info(f"Found content image ({w}x{h})")
-                        break
+    except Exception as e:
+        logging.error(f"Scraping Error: {e}")
+        return None
+
+def finish_article(parsed, mode):
+    """Applies the mode-specific image rule to a parsed article"""
+    image_url = parsed["image"]
+    
+    # Use fallback for concepts only
+    if not image_url and mode == "CONCEPT":
+        logging.warning("No image found. Using Fallback.")
+        image_url = random.choice(FALLBACK_IMAGES)
+    
+    if not image_url:
+        logging.warning("No suitable image found. SKIP.")
+        return None
+    
+    return {"text": parsed["text"], "image": image_url}
+
+def parse_article(body, charset=None):
+    """Extracts the article text and best image (or None) from raw HTML. False if there is too little text."""
+    try:
+        soup = BeautifulSoup(body, 'lxml', parse_only=_ARTICLE_STRAINER, from_encoding=charset)
         
-        # Strategy 5: Fallback to first valid image
-        if not image_url:
-            first_img = target.find('img')
-            if first_img and first_img.get('src'):
-                src = first_img['src']
-                if src.startswith('http'): 
-                    image_url = src
-                    logging.info("Using first available image")
+        target = _BODY_SEL.select_one(soup) or soup
+        # Stop collecting once we have enough text instead of joining every paragraph
+        parts, total = [], 0
+        for p in target.find_all(['p', 'h2']):
+            part = p.get_text().strip()
+            if not part: continue
+            parts.append(part)
+            total += len(part) + 1
+            if total >= 12000: break
+        text = "\n".join(parts)
         
-        # Strategy 6: Use fallback for concepts only
-        if not image_url and mode == "CONCEPT":
-            logging.warning("No image found. Using Fallback.")
-            image_url = random.choice(FALLBACK_IMAGES)
+        if len(text) < 600: return False
         
-        if not image_url:
-            logging.warning("No suitable image found. SKIP.")
-            return None 
-            
-        return {"text": text[:12000], "image": image_url}
+        # ENHANCED IMAGE EXTRACTION - single ranked pass
+        return {"text": text[:12000], "image": find_best_image(soup, target)}
         
     except Exception as e:
-        logging.error(f"Scraping Error: {e}")
+        logging.error(f"Parsing Error: {e}")
         return None
 
-def fetch_content(history_data):
-    # CHANGED: Prioritize concepts (85% concepts, 15% news)
-    mode = "CONCEPT" if random.random() > 0.15 else "NEWS"
-    sources = ENGINEERING_FEEDS if mode == "CONCEPT" else NEWS_FEEDS
-    random.shuffle(sources)
+def fetch_content(seen, feed_meta, claimed, news_feeds=NEWS_FEEDS, engineering_feeds=ENGINEERING_FEEDS, concept_share=CONCEPT_SHARE, stop=None):
+    mode = "CONCEPT" if random.random() < concept_share else "NEWS"
+    sources = engineering_feeds if mode == "CONCEPT" else news_feeds
     
     logging.info(f"Mode Selected: {mode}")
     
-    for feed_url in sources:
-        try:
-            feed = feedparser.parse(feed_url)
-            for entry in feed.entries[:3]:
-                if is_already_posted(entry.link, entry.title, history_data): continue
-                details = get_article_details(entry.link, mode)
-                if not details: continue 
-                return {
-                    "type": mode,
-                    "title": entry.title,
-                    "link": entry.link,
-                    "full_text": details["text"],
-                    "image_url": details["image"]
-                }
-        except: continue
+    # Feeds download in parallel and each feed's candidates are queued for scraping as soon as
+    # that feed lands, without waiting on the slowest feed. The pick follows the weighted order,
+    # not latency: once an article qualifies, better-ranked work still in flight gets PICK_WINDOW
+    # to finish, and the best-ranked usable article wins.
+    ordered = order_sources(sources, feed_meta)
+    rank = {url: i for i, url in enumerate(ordered)}
+    feed_pool = ThreadPoolExecutor(max_workers=FEED_WORKERS)
+    scrape_pool = ThreadPoolExecutor(max_workers=SCRAPE_WORKERS)
+    feed_futures = {feed_pool.submit(safe_fetch_feed, url, feed_meta): url for url in ordered}
+    scrape_futures = {}
+    pending = set(feed_futures)
+    best, deadline = None, None  # best: ((feed rank, entry index), feed_url, entry, details)
+    
+    try:
+        while pending:
+            timeout = None if deadline is None else max(0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            # A prefetch whose result is no longer wanted (the post went out)
+            if stop and stop.is_set(): return None
+            for future in done:
+                if future in feed_futures:
+                    feed_url, feed = feed_futures[future], future.result()
+                    if not feed: continue
+                    live_links = {e.get("link") for e in feed}
+                    with FEED_META_LOCK:
+                        stats = feed_meta.setdefault(feed_url, {})
+                        # Remember rejections only for articles the feed still lists
+                        rejected = stats["rejected"] = {k: v for k, v in stats.get("rejected", {}).items() if k in live_links}
+                    for index, entry in enumerate(feed[:3]):
+                        if not (entry.get("link") and entry.get("title")): continue
+                        if is_already_posted(entry["link"], entry["title"], seen): continue
+                        # Already tried by an earlier attempt this run
+                        if entry["link"] in claimed: continue
+                        if _SKIP_TITLE_RE.search(entry["title"]):
+                            logging.info(f"Skipping promotional entry: {entry['title']}")
+                            continue
+                        scrape = scrape_pool.submit(get_article_details, entry["link"], mode, rejected.get(entry["link"]))
+                        scrape_futures[scrape] = ((rank[feed_url], index), feed_url, entry)
+                        pending.add(scrape)
+                    continue
+                
+                details = future.result()
+                key, feed_url, entry = scrape_futures[future]
+                if details is False:
+                    # The page itself was unusable; timeouts, 5xx and mode-specific skips are not remembered
+                    with FEED_META_LOCK: feed_meta[feed_url].setdefault("rejected", {})[entry["link"]] = formatdate(usegmt=True)
+                if not details:
+                    claimed.add(entry["link"])
+                    continue
+                if best is None or key < best[0]:
+                    best = (key, feed_url, entry, details)
+                if deadline is None:
+                    deadline = time.monotonic() + PICK_WINDOW
+            
+            if best is None: continue
+            # Done once the window closes or nothing still running could outrank the pick
+            better = any(rank[feed_futures[f]] < best[0][0] if f in feed_futures else scrape_futures[f][0] < best[0] for f in pending)
+            if better and time.monotonic() < deadline: continue
+            
+            key, feed_url, entry, details = best
+            # Only the pick is claimed; runners-up stay open to later attempts (their parse is cached)
+            claimed.add(entry["link"])
+            return {
+                "feed": feed_url,
+                "type": mode,
+                "title": entry["title"],
+                "link": entry["link"],
+                "full_text": details["text"],
+                "image_url": details["image"]
+            }
+    finally:
+        # Don't wait on the losers: queued work is dropped, in-flight requests finish in the background
+        feed_pool.shutdown(wait=False, cancel_futures=True)
+        scrape_pool.shutdown(wait=False, cancel_futures=True)
     return None
 
 # --- AI WRITER WITH UNICODE STYLING ---
-def generate_viral_post(content_item):
-    valid_model = get_valid_model_name()
-    logging.info(f"Asking Gemini ({valid_model})...")
-    
-    if not GEMINI_API_KEY:
-        logging.error("GEMINI_API_KEY is missing!")
-        return None
-
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{valid_model}:generateContent?key={GEMINI_API_KEY}"
-    
-    base_structure = """
+_BASE_STRUCTURE = """
     CRITICAL FORMATTING RULES FOR LINKEDIN:
     1. NO Markdown syntax (**, __, ##) - LinkedIn doesn't support it
     2. Use [BOLD:text] for emphasis - will be converted to Unicode bold
     3. Use these emojis for structure: 💡 🔹 👉 🚀 ⚠️ ⚡ 🎯
     4. Use line breaks and spacing for readability
     5. Keep it visually clean and scannable
+    6. Do NOT include links or hashtags - they are added after generation
     """
-    
-    if content_item['type'] == "CONCEPT":
-        prompt = f"""
+
+# Per-article input goes last, after the static instructions, so the prompts share
+# one long prefix (friendlier to Gemini's implicit prefix caching)
+_ARTICLE_TAIL = """
+        ---
+        {label}: {{title}}
+        Context: {{context}}
+        """
+
+# Built once at import; only {title}/{context} are filled per call
+_CONCEPT_TMPL = _BASE_STRUCTURE + """
         Act as a Principal Staff Engineer writing for LinkedIn.
-        Topic: {content_item['title']}
-        Context: {content_item['full_text'][:5000]}
-        {base_structure}
         
         OUTPUT FORMAT (use exact structure):
         
@@ -304,17 +793,10 @@ def generate_viral_post(content_item):
         
         🎯 [BOLD:Bottom Line:]
         [Sharp 1-line conclusion]
-        
-        🔗 Read more: {content_item['link']}
-        
-        #systemdesign #softwarearchitecture #engineering
-        """
-    else: 
-        prompt = f"""
+        """ + _ARTICLE_TAIL.format(label="Topic")
+
+_NEWS_TMPL = _BASE_STRUCTURE + """
         Act as a Tech Lead writing LinkedIn news commentary.
-        News: {content_item['title']}
-        Context: {content_item['full_text'][:4000]}
-        {base_structure}
         
         OUTPUT FORMAT (use exact structure):
         
@@ -330,56 +812,161 @@ def generate_viral_post(content_item):
         ▸ [Market/industry impact]
         
         [Sharp cynical 1-line take]
-        
-        🔗 Source: {content_item['link']}
-        
-        #tech #technews #engineering
-        """
+        """ + _ARTICLE_TAIL.format(label="News")
+
+# The link goes in verbatim from code rather than trusting the model to copy it
+_CONCEPT_FOOTER = "🔗 Read more: {link}\n\n#systemdesign #softwarearchitecture #engineering"
+_NEWS_FOOTER = "🔗 Source: {link}\n\n#tech #technews #engineering"
+
+# Content type -> (prompt template, footer). Callers such as plan.py pass their own via main(templates=...)
+TEMPLATES = {
+    "CONCEPT": (_CONCEPT_TMPL, _CONCEPT_FOOTER),
+    "NEWS": (_NEWS_TMPL, _NEWS_FOOTER),
+}
+
+PROMPT_CONTEXT_CHARS = 2000
+
+def build_prompt_context(title, full_text, limit=PROMPT_CONTEXT_CHARS):
+    """Cheap extractive summary: the lead paragraphs plus any later paragraph mentioning a title keyword"""
+    paragraphs = full_text.split("\n")
+    keywords = {w.lower() for w in re.findall(r'\w{4,}', title)}
+    
+    picked, total = [], 0
+    for i, para in enumerate(paragraphs):
+        if i >= 8 and not any(k in para.lower() for k in keywords): continue
+        picked.append(para)
+        total += len(para) + 1
+        if total >= limit: break
+    return "\n".join(picked)[:limit]
+
+def call_gemini(model, prompt):
+    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={GEMINI_API_KEY}"
+    return request_with_backoff(SESSION, "POST", url, bucket=GEMINI_BUCKET, headers={"Content-Type": "application/json"}, json={"contents": [{"parts": [{"text": prompt}]}]})
+
+def generate_viral_post(content_item, templates=TEMPLATES):
+    if not GEMINI_API_KEY:
+        logging.error("GEMINI_API_KEY is missing!")
+        return None
+
+    template, footer = templates[content_item['type']]
+    prompt = template.format_map({
+        "title": content_item['title'],
+        "context": build_prompt_context(content_item['title'], content_item['full_text'])
+    })
+    footer = "\n\n" + footer.format(link=content_item['link'])
+    prompt_key = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+    cached = get_cached_post(content_item['link'], prompt_key)
+    if cached:
+        logging.info("Reusing the post generated earlier for this article.")
+        return cached + footer
 
     try:
-        resp = requests.post(url, headers={"Content-Type": "application/json"}, json={"contents": [{"parts": [{"text": prompt}]}]})
+        model = cached_model_name() or PREFERRED_MODELS[0]
+        logging.info(f"Asking Gemini ({model})...")
+        resp = call_gemini(model, prompt)
+        
+        # Unknown/retired model: ask Google what is available and retry once
+        if resp.status_code in (400, 404):
+            fallback = get_valid_model_name(refresh=True)
+            if fallback != model:
+                logging.warning(f"Model {model} rejected ({resp.status_code}). Retrying with {fallback}...")
+                resp = call_gemini(fallback, prompt)
         
         if resp.status_code != 200:
             logging.error(f"GOOGLE API ERROR {resp.status_code}: {resp.text}")
             return None
 
-        text = resp.json()['candidates'][0]['content']['parts'][0]['text']
-        return clean_text_for_linkedin(text)
+        text = orjson.loads(resp.content)['candidates'][0]['content']['parts'][0]['text']
+        post_text = clean_text_for_linkedin(text)
+        cache_post(content_item['link'], prompt_key, post_text)
+        return post_text + footer
 
     except Exception as e:
         logging.error(f"EXCEPTION: {e}")
     return None
 
 # --- POSTER ---
-def post_to_linkedin(content, image_url):
-    logging.info(f"Uploading Image: {image_url}")
+def download_image(image_url):
+    """
+    Capped download of the post image into a spooled temp file (in memory up to 512KB, on disk beyond),
+    rewound and ready to PUT. Returns None for errors, error pages, non-images and oversized files.
+    """
+    r = SESSION.get(image_url, timeout=10, stream=True)
+    if r.status_code != 200 or not r.headers.get("Content-Type", "").startswith("image/"):
+        logging.warning(f"Not an image ({r.status_code}, {r.headers.get('Content-Type')}): {image_url}")
+        r.close()
+        return None
+    buf = tempfile.SpooledTemporaryFile(max_size=512 * 1024)
+    with r:
+        for chunk in r.iter_content(chunk_size=64 * 1024):
+            buf.write(chunk)
+            if buf.tell() > MAX_IMAGE_BYTES:
+                logging.warning(f"Image over {MAX_IMAGE_BYTES} bytes: {image_url}")
+                buf.close()
+                return None
+    buf.seek(0)
+    return buf
+
+def prefetch_image(image_url):
+    """Downloads the post image ahead of posting. Returns the spooled file, or None so posting downloads it itself."""
     try:
-        img_data = requests.get(image_url, headers=HEADERS, timeout=10).content
-    except:
-        logging.error("Failed to download image.")
-        return False
-    
-    reg = requests.post(
-        "https://api.linkedin.com/v2/assets?action=registerUpload",
-        headers={"Authorization": f"Bearer {LINKEDIN_ACCESS_TOKEN}"},
-        json={
-            "registerUploadRequest": {
-                "recipes": ["urn:li:digitalmediaRecipe:feedshare-image"],
-                "owner": LINKEDIN_PERSON_URN,
-                "serviceRelationships": [{"relationshipType": "OWNER", "identifier": "urn:li:userGeneratedContent"}]
-            }
+        return download_image(image_url)
+    except Exception as e:
+        logging.warning(f"Image prefetch failed: {e}")
+        return None
+
+def upload_image_asset(image_url, image_file=None):
+    """Registers the LinkedIn upload (downloading the image concurrently unless prefetched), then PUTs the file. Returns the asset URN or None."""
+    register_body = {
+        "registerUploadRequest": {
+            "recipes": ["urn:li:digitalmediaRecipe:feedshare-image"],
+            "owner": LINKEDIN_PERSON_URN,
+            "serviceRelationships": [{"relationshipType": "OWNER", "identifier": "urn:li:userGeneratedContent"}]
         }
-    )
-    
-    if reg.status_code != 200: 
-        logging.error(f"LinkedIn Upload Error: {reg.text}")
-        return False
-    
-    upload_url = reg.json()['value']['uploadMechanism']['com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest']['uploadUrl']
-    asset = reg.json()['value']['asset']
-    
-    up = requests.put(upload_url, data=img_data, headers={"Authorization": f"Bearer {LINKEDIN_ACCESS_TOKEN}"})
-    if up.status_code != 201: return False
+    }
+
+    # The download and the registerUpload call are independent, so overlap the two round trips
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        f_reg = ex.submit(request_with_backoff, LINKEDIN_SESSION, "POST", "https://api.linkedin.com/v2/assets?action=registerUpload", bucket=LINKEDIN_BUCKET, json=register_body)
+        f_img = ex.submit(download_image, image_url) if image_file is None else None
+
+        try:
+            if f_img: image_file = f_img.result()
+        except Exception as e:
+            logging.error(f"Failed to download image: {e}")
+            return None
+        if not image_file: return None
+
+        try:
+            reg = f_reg.result()
+        except Exception as e:
+            logging.error(f"LinkedIn Upload Error: {e}")
+            image_file.close()
+            return None
+
+    try:
+        if reg.status_code != 200:
+            logging.error(f"LinkedIn Upload Error: {reg.text}")
+            return None
+
+        reg_data = orjson.loads(reg.content)['value']
+        upload_url = reg_data['uploadMechanism']['com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest']['uploadUrl']
+        asset = reg_data['asset']
+
+        # A seekable file body: urllib3 rewinds it when the adapter re-sends the PUT after a 5xx or a dropped connection
+        up = LINKEDIN_SESSION.put(upload_url, data=image_file, timeout=API_TIMEOUT)
+    except Exception as e:
+        logging.error(f"LinkedIn Image Upload Error: {e}")
+        return None
+    finally:
+        image_file.close()
+    if up.status_code != 201: return None
+    return asset
+
+def post_to_linkedin(content, image_url, image_file=None):
+    logging.info(f"Uploading Image: {image_url}")
+    asset = upload_image_asset(image_url, image_file)
+    if not asset: return False
     
     post_body = {
         "author": LINKEDIN_PERSON_URN,
@@ -394,44 +981,94 @@ def post_to_linkedin(content, image_url):
         "visibility": {"com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"}
     }
     
-    final = requests.post("https://api.linkedin.com/v2/ugcPosts", headers={"Authorization": f"Bearer {LINKEDIN_ACCESS_TOKEN}"}, json=post_body)
+    # Only 429 is retried here: after a 5xx the post may already be live, and a replay would double-post
+    try:
+        final = request_with_backoff(LINKEDIN_SESSION, "POST", "https://api.linkedin.com/v2/ugcPosts", retry_statuses=(429,), bucket=LINKEDIN_BUCKET, json=post_body)
+    except requests.RequestException as e:
+        logging.error(f"LinkedIn Post Error: {e}")
+        return False
     return final.status_code == 201
 
 # --- MAIN ---
-if __name__ == "__main__":
+def find_content(seen, feed_meta, claimed, **source_opts):
+    """fetch_content for one attempt; errors are logged and count as no content."""
+    try:
+        content = fetch_content(seen, feed_meta, claimed, **source_opts)
+    except Exception as e:
+        logging.error(f"Pipeline Error: {e}")
+        return None
+    if not content:
+        logging.info("-> No content found.")
+    return content
+
+def write_post(content, templates=TEMPLATES):
+    """Writes the post for content. Returns post_text or None."""
+    try:
+        # Independent round trips: write the post while the image downloads
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            f_text = ex.submit(generate_viral_post, content, templates)
+            f_img = ex.submit(prefetch_image, content['image_url'])
+            post_text, content['image_file'] = f_text.result(), f_img.result()
+        
+        return post_text
+    except Exception as e:
+        logging.error(f"Pipeline Error: {e}")
+        return None
+
+def main(templates=TEMPLATES, **source_opts):
+    """Runs the bot once. templates overrides the prompts; source_opts (news_feeds, engineering_feeds, concept_share) override the feeds."""
     logging.info("Bot Started...")
     history = load_history()
-    posted_successfully = False
+    seen = build_seen_index(history)
+    feed_meta = load_feed_meta()
     
-    for attempt in range(1, 6):
-        if posted_successfully: break
-        logging.info(f"--- Attempt {attempt}/5 ---")
-        
-        content = fetch_content(history)
-        if not content: 
-            logging.info("-> No content found.")
-            continue 
-            
-        post_text = generate_viral_post(content)
-        if not post_text: 
-            continue 
+    # Attempts run one after another, so only one Gemini draft is in flight. The next attempt's
+    # candidate is scraped while the current one is written and posted; once a post goes out,
+    # stop ends that prefetch. Feeds are downloaded once per run; later attempts skip links already tried.
+    claimed = set()
+    stop = threading.Event()
+    prefetcher = ThreadPoolExecutor(max_workers=1)
+    next_content = prefetcher.submit(find_content, seen, feed_meta, claimed, stop=stop, **source_opts)
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        logging.info(f"--- Attempt {attempt}/{MAX_ATTEMPTS} ---")
+        content = next_content.result()
+        if attempt < MAX_ATTEMPTS:
+            next_content = prefetcher.submit(find_content, seen, feed_meta, claimed, stop=stop, **source_opts)
+        if not content:
+            continue
+        post_text = write_post(content, templates)
+        if not post_text:
+            continue
         
         logging.info("\n--- PREVIEW ---")
         print(post_text) # Keep print for local debugging visibility only
         logging.info("--- END PREVIEW ---")
         
         # --- HUMAN DELAY LOGIC ---
-        # Sleep between 0 and 5 minutes (300 seconds)
-        human_delay = random.randint(0, 300)
-        minutes = round(human_delay / 60, 2)
-        logging.info(f"😴 Simulating human behavior: Sleeping for {human_delay}s ({minutes} mins) before posting...")
-        time.sleep(human_delay)
+        # Opt-in: sleep between 0 and HUMANIZE_DELAY_MAX seconds (the workflow sets 300)
+        if HUMANIZE_DELAY_MAX:
+            human_delay = random.randint(0, HUMANIZE_DELAY_MAX)
+            minutes = round(human_delay / 60, 2)
+            logging.info(f"😴 Simulating human behavior: Sleeping for {human_delay}s ({minutes} mins) before posting...")
+            time.sleep(human_delay)
         # -------------------------
 
-        if post_to_linkedin(post_text, content['image_url']):
+        if post_to_linkedin(post_text, content['image_url'], content.get('image_file')):
              logging.info("✅ Posted Successfully!")
-             save_history(history, content['title'], content['link'])
-             posted_successfully = True
+             save_history(history, content['title'], content['link'], seen)
+             # Feed weighting (order_sources) rewards the feed that produced the published post
+             with FEED_META_LOCK:
+                 stats = feed_meta[content['feed']]
+                 stats["success"] = stats.get("success", 0) + 1
+             break
         else:
+             # No fixed pause: LINKEDIN_BUCKET paces the next post and 429s back off on their own
              logging.error("API Post failed. Retrying...")
-             time.sleep(5)
\ No newline at end of file
+    
+    stop.set()
+    prefetcher.shutdown(wait=False, cancel_futures=True)
+    save_feed_meta(feed_meta)
+    save_article_cache(seen)
+
+if __name__ == "__main__":
+    main()